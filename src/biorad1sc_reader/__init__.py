@@ -1,2 +1,2 @@
-from .reader import Reader
+from .reader import Reader, convert_many
 from .errors import BioRadInvalidFileError, BioRadParsingError
@@ -8,12 +8,16 @@ Command-line utility to save image data from Bio-Rad *.1sc file to
 import sys
 import os.path
 import argparse
+import functools
 import biorad1sc_reader
 
 
-def get_cmdline_args():
+@functools.lru_cache(maxsize=1)
+def get_cmdline_parser():
     """
     Return parser for command-line arguments, options
+
+    Only built once, later calls return the same parser.
     """
     # initialize the parser object:
     parser = argparse.ArgumentParser(
@@ -23,7 +27,11 @@ def get_cmdline_args():
     # specifying nargs= puts outputs of parser in list (even if nargs=1)
 
     # required arguments
-    parser.add_argument("src_1sc_file", nargs="+", help="Source 1sc file.")
+    parser.add_argument(
+        "src_1sc_file",
+        nargs="+",
+        help="Source 1sc file, or directory to convert all 1sc files in.",
+    )
 
     # switches/options:
     parser.add_argument(
@@ -44,41 +52,97 @@ def get_cmdline_args():
         " in same directory as source file.",
     )
 
-    args = parser.parse_args()
+    return parser
+
+
+def get_cmdline_args(argv=None):
+    """
+    Return parsed command-line arguments, options
+
+    Args:
+        argv (list, optional): arguments to parse, defaults to sys.argv[1:]
+    """
+    args = get_cmdline_parser().parse_args(argv)
 
     return args
 
 
-def main():
+def expand_src_files(src_paths):
+    """
+    Return list of 1sc files, with each directory replaced by its 1sc files
+
+    Args:
+        src_paths (list): filepaths to 1sc files or directories
+
+    Returns:
+        list: filepaths to 1sc files
+    """
+    src_files = []
+    for src_path in src_paths:
+        if os.path.isdir(src_path):
+            # scandir entries already know if they are files, no extra stat
+            with os.scandir(src_path) as entries:
+                src_files.extend(
+                    sorted(
+                        entry.path
+                        for entry in entries
+                        if entry.name.lower().endswith(".1sc") and entry.is_file()
+                    )
+                )
+        else:
+            src_files.append(src_path)
+    return src_files
+
+
+def report_file(srcfilename, outfilename, error):
+    """
+    Print the outcome of converting one 1sc file, as soon as it finishes
+    """
+    print(srcfilename, file=sys.stderr)
+    if error is None:
+        print("    -> " + outfilename, file=sys.stderr)
+    else:
+        print("    Error: %s" % error, file=sys.stderr)
+
+
+def main(argv=None):
     """
     Top-level of program
+
+    Args:
+        argv (list, optional): command-line arguments, defaults to
+            sys.argv[1:]
     """
-    args = get_cmdline_args()
+    args = get_cmdline_args(argv)
+    src_files = expand_src_files(args.src_1sc_file)
 
-    if args.output_filename and len(args.src_1sc_file) > 1:
+    if not src_files:
+        print("No 1sc files found in: " + ", ".join(args.src_1sc_file))
+        return 1
+
+    if args.output_filename and len(src_files) > 1:
         print(
             "Sorry, you cannot specify an output filename with more than "
             "one input files."
         )
         return 1
 
-    for srcfilename in args.src_1sc_file:
-        print(srcfilename, file=sys.stderr)
+    file_pairs = []
+    for srcfilename in src_files:
         if args.output_filename:
             outfilename = args.output_filename
         else:
             (rootfile, _) = os.path.splitext(srcfilename)
             outfilename = rootfile + ".tif"
+        file_pairs.append((srcfilename, outfilename))
 
-        print("    -> " + outfilename, file=sys.stderr)
-        # open reader instance and read in file
-        bio1sc_reader = biorad1sc_reader.Reader(srcfilename)
-
-        if args.scale:
-            bio1sc_reader.save_img_as_tiff_sc(outfilename, invert=args.invert)
-        else:
-            bio1sc_reader.save_img_as_tiff(outfilename, invert=args.invert)
+    # convert all files in parallel, reporting each one as it finishes
+    out_files = biorad1sc_reader.convert_many(
+        file_pairs, invert=args.invert, scale=args.scale, callback=report_file
+    )
 
+    if None in out_files:
+        return 1
     return 0
 
 
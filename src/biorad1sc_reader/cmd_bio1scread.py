@@ -5,10 +5,13 @@
 import os.path
 import sys
 import argparse
+import itertools
+import mmap
 import struct
 from terminaltables import AsciiTable
 import biorad1sc_reader
 from biorad1sc_reader.constants import BLOCK_PTR_TYPES, REGION_DATA_TYPES
+from biorad1sc_reader.parsing import _get_struct
 
 
 # TODO: add assertions, so we can automatically check if our understanding
@@ -17,6 +20,26 @@ from biorad1sc_reader.constants import BLOCK_PTR_TYPES, REGION_DATA_TYPES
 
 MAX_LINE_LEN = 80
 
+# 8-byte field header read as uint16s and as uint32s
+FIELD_HEADER_UINT16S_STRUCT = struct.Struct("<4H")
+FIELD_HEADER_UINT32S_STRUCT = struct.Struct("<2I")
+
+# translation table for str_safe_bytes: NULL -> space, printable ASCII
+#   unchanged, everything else -> 0xff
+STR_SAFE_TABLE = bytes.maketrans(
+    bytes(range(256)), b"\x20" + b"\xff" * 31 + bytes(range(32, 127)) + b"\xff" * 129
+)
+
+# format of each word for print_list_simple, by (bits, hexfmt)
+PRINT_LIST_SIMPLE_FMTS = {
+    (8, True): "0x{:02x}",
+    (8, False): "{:4d}",
+    (16, True): "0x{:04x}",
+    (16, False): "{:6d}",
+    (32, True): "0x{:08x}",
+    (32, False): "{:10d}",
+}
+
 
 def print_raw_data(data_raw, tab, label_len, hex=True, file=sys.stdout):
     line_chars_avail = MAX_LINE_LEN - len(tab) - label_len
@@ -55,100 +78,106 @@ def print_list(byte_list, bits=8, address=None, var_tab=False, file=sys.stdout):
     byte_groups = range(0, len(byte_list), items)
     byte_groups = [[x, min([x + items, len(byte_list)])] for x in byte_groups]
 
+    # build all output, then write it at once instead of printing each word
+    parts = []
     if address is None:
-        print("\t[", end="", file=file)
-        first_loop = True
+        parts.append("\t[")
         for (i, byte_group) in enumerate(byte_groups):
-            if first_loop:
-                first_loop = False
-            else:
-                print("\t ", end="", file=file)
-
-            # print decimal words
-            for byte in byte_list[byte_group[0] : byte_group[1]]:
-                print(pr_str.format(byte), end="", file=file)
-            # print spacer
-            print(file=file)
-            print("         ", end="", file=file)
-            # print hex words
-            for byte in byte_list[byte_group[0] : byte_group[1]]:
-                print(pr_str_hex.format(byte), end="", file=file)
+            if i > 0:
+                parts.append("\t ")
+            words = byte_list[byte_group[0] : byte_group[1]]
+
+            # decimal words
+            parts.extend(pr_str.format(byte) for byte in words)
+            # spacer
+            parts.append("\n         ")
+            # hex words
+            parts.extend(pr_str_hex.format(byte) for byte in words)
 
             if i < len(byte_groups) - 1:
-                print(file=file)
-        print("]", file=file)
+                parts.append("\n")
+        parts.append("]\n")
     else:
-        first_loop = True
+        if var_tab is False:
+            spacer = "            "
+        else:
+            spacer = "%s      " % (var_tab)
         for (i, byte_group) in enumerate(byte_groups):
-            # print address start
+            words = byte_list[byte_group[0] : byte_group[1]]
+
+            # address start
             if len(byte_groups) > 1:
                 if var_tab is False:
-                    print(
-                        "    %6d: " % (address + i * items * bits / 8),
-                        end="",
-                        file=file,
-                    )
-                else:
-                    print(
-                        "%s%4d: " % (var_tab, address + i * items * bits / 8),
-                        end="",
-                        file=file,
-                    )
-            else:
-                if var_tab is False:
-                    print("            ", end="", file=file)
+                    parts.append("    %6d: " % (address + i * items * bits / 8))
                 else:
-                    print("%s      " % (var_tab), end="", file=file)
-            # print decimal words
-            for byte in byte_list[byte_group[0] : byte_group[1]]:
-                print(pr_str.format(byte), end="", file=file)
-            print(file=file)
-
-            # print spacer
-            if var_tab is False:
-                print("            ", end="", file=file)
+                    parts.append("%s%4d: " % (var_tab, address + i * items * bits / 8))
             else:
-                print("%s      " % (var_tab), end="", file=file)
-            # print hex words
-            for byte in byte_list[byte_group[0] : byte_group[1]]:
-                print(pr_str_hex.format(byte), end="", file=file)
-            print(file=file)
+                parts.append(spacer)
+            # decimal words
+            parts.extend(pr_str.format(byte) for byte in words)
+            parts.append("\n")
 
+            # spacer, hex words
+            parts.append(spacer)
+            parts.extend(pr_str_hex.format(byte) for byte in words)
+            parts.append("\n")
 
-def print_list_simple(wordlist, bits=8, hexfmt=False):
-    outstr = ""
-    # print list of words
-    first_time = True
-    for myword in wordlist:
-        if not first_time:
-            outstr = outstr + " "
-        else:
-            first_time = False
+    file.write("".join(parts))
 
-        if bits == 8:
-            if hexfmt:
-                outstr = outstr + "0x{:02x}".format(myword)
-            else:
-                outstr = outstr + "%4d" % myword
-        if bits == 16:
-            if hexfmt:
-                outstr = outstr + "0x{:04x}".format(myword)
-            else:
-                outstr = outstr + "%6d" % myword
-        if bits == 32:
-            if hexfmt:
-                outstr = outstr + "0x{:08x}".format(myword)
-            else:
-                outstr = outstr + "%10d" % myword
 
-    return outstr
+def ascii_table(table_data):
+    """
+    Return table_data (list of rows, each a list of cells) as an ASCII table
+
+    Gives the same output as AsciiTable(table_data).table, but formats
+    rows directly from the column widths.  Cells may span several lines.
+    """
+    rows = [[str(cell).split("\n") for cell in row] for row in table_data]
+    if not all(
+        max(line, default="") < "\x80" and line.isprintable()
+        for row in rows
+        for cell in row
+        for line in cell
+    ):
+        # let terminaltables work out the display width of unusual characters
+        return AsciiTable(table_data).table
+
+    num_cols = max(len(row) for row in rows)
+    col_widths = [0] * num_cols
+    for row in rows:
+        for (col, cell) in enumerate(row):
+            col_widths[col] = max(col_widths[col], max(len(line) for line in cell))
+
+    border = "+" + "+".join("-" * (width + 2) for width in col_widths) + "+"
+    out_lines = [border]
+    for (i, row) in enumerate(rows):
+        row = row + [[""]] * (num_cols - len(row))
+        for line_num in range(max(len(cell) for cell in row)):
+            out_lines.append(
+                "| "
+                + " | ".join(
+                    (cell[line_num] if line_num < len(cell) else "").ljust(width)
+                    for (cell, width) in zip(row, col_widths)
+                )
+                + " |"
+            )
+        if i == 0:
+            # border under heading row
+            out_lines.append(border)
+    if len(rows) > 1:
+        out_lines.append(border)
+
+    return "\n".join(out_lines)
+
+
+def print_list_simple(wordlist, bits=8, hexfmt=False):
+    word_fmt = PRINT_LIST_SIMPLE_FMTS.get((bits, hexfmt), "")
+    # print list of words
+    return " ".join(word_fmt.format(myword) for myword in wordlist)
 
 
 def str_safe_bytes(byte_stream):
-    table_from = bytes(range(256))
-    table_to = b"\x20" + b"\xff" * 31 + bytes(range(32, 127)) + b"\xff" * 129
-    trans_table = byte_stream.maketrans(table_from, table_to)
-    safe_byte_stream = byte_stream.translate(trans_table)
+    safe_byte_stream = byte_stream.translate(STR_SAFE_TABLE)
     return safe_byte_stream
 
 
@@ -159,25 +188,25 @@ def unpack_string(byte_stream):
 
 def unpack_uint8(byte_stream):
     num_uint8 = len(byte_stream)
-    out_uint8s = struct.unpack("B" * num_uint8, byte_stream)
+    out_uint8s = _get_struct("%dB" % num_uint8).unpack(byte_stream)
     return out_uint8s
 
 
 def unpack_uint16(byte_stream, endian="<"):
     num_uint16 = len(byte_stream) // 2
-    out_uint16s = struct.unpack(endian + "H" * num_uint16, byte_stream)
+    out_uint16s = _get_struct("%s%dH" % (endian, num_uint16)).unpack(byte_stream)
     return out_uint16s
 
 
 def unpack_uint32(byte_stream, endian="<"):
     num_uint32 = len(byte_stream) // 4
-    out_uint32s = struct.unpack(endian + "I" * num_uint32, byte_stream)
+    out_uint32s = _get_struct("%s%dI" % (endian, num_uint32)).unpack(byte_stream)
     return out_uint32s
 
 
 def unpack_uint64(byte_stream, endian="<"):
     num_uint64 = len(byte_stream) // 8
-    out_uint64s = struct.unpack(endian + "Q" * num_uint64, byte_stream)
+    out_uint64s = _get_struct("%s%dQ" % (endian, num_uint64)).unpack(byte_stream)
     return out_uint64s
 
 
@@ -191,8 +220,8 @@ def debug_generic(
     file=sys.stdout,
 ):
     bytes_per = struct.calcsize(format_str)
-    num_shorts = len(byte_stream) // (bytes_per)
-    out_shorts = struct.unpack("<" + format_str * num_shorts, byte_stream)
+    num_shorts = len(byte_stream) // bytes_per
+    out_shorts = _get_struct("<%d%s" % (num_shorts, format_str)).unpack(byte_stream)
     byte_idx = byte_start + len(byte_stream)
     if not quiet:
         if var_tab is not False:
@@ -250,17 +279,18 @@ def debug_string(
     if not quiet:
         print("%6d-%6d: %s" % (byte_start, byte_idx - 1, note_str), file=file)
         if multiline:
+            parts = []
             for i in range(1 + len(byte_stream) // chars_in_line):
                 byte_substream = byte_stream[
                     i * chars_in_line : (i + 1) * chars_in_line
                 ]
                 byte_substring = str_safe_bytes(byte_substream)
                 out_substring = byte_substring.decode("utf-8", "replace")
-                print("    %5d: " % (byte_start + i * chars_in_line), end="", file=file)
-                for char in out_substring:
-                    print(" %s" % (char), end="", file=file)
-                print(file=file)
-                print("           " + byte_substream.hex(), file=file)
+                parts.append("    %5d: " % (byte_start + i * chars_in_line))
+                parts.extend(" %s" % (char) for char in out_substring)
+                parts.append("\n")
+                parts.append("           " + byte_substream.hex() + "\n")
+            file.write("".join(parts))
         else:
             if len(out_string) > 0 and out_string[-1] == "\x00":
                 print("\t" + out_string[:-1], file=file)
@@ -279,8 +309,8 @@ def is_valid_string(byte_stream):
 
 def print_field_header(in_bytes, byte_idx, file=sys.stdout, quiet=False):
     # read header
-    header_uint16s = unpack_uint16(in_bytes[byte_idx : byte_idx + 8], endian="<")
-    header_uint32s = unpack_uint32(in_bytes[byte_idx : byte_idx + 8], endian="<")
+    header_uint16s = FIELD_HEADER_UINT16S_STRUCT.unpack_from(in_bytes, byte_idx)
+    header_uint32s = FIELD_HEADER_UINT32S_STRUCT.unpack_from(in_bytes, byte_idx)
 
     field_type = header_uint16s[0]
     field_len = header_uint16s[1]
@@ -314,6 +344,7 @@ def read_field(
     file=sys.stdout,
     quiet=False,
     report_strings=True,
+    need_refs=True,
 ):
     if field_ids is None:
         field_ids = {}
@@ -322,7 +353,7 @@ def read_field(
     field_start = byte_idx
 
     # quiet=True if Field Type is String and we're not reporting them
-    field_type_pre = unpack_uint16(in_bytes[byte_idx : byte_idx + 2], endian="<")[0]
+    field_type_pre = FIELD_HEADER_UINT16S_STRUCT.unpack_from(in_bytes, byte_idx)[0]
     if field_type_pre == 16 and report_strings == False:
         quiet = True
 
@@ -334,12 +365,22 @@ def read_field(
     # get payload bytes
     field_payload = in_bytes[byte_idx + 8 : byte_idx + field_len]
 
-    # check for references
-    bytes_0mod4 = field_payload[0 : len(field_payload) // 4 * 4]
-    bytes_2mod4 = field_payload[2 : 2 + (len(field_payload) - 2) // 4 * 4]
-    out_uint32s1 = unpack_uint32(bytes_0mod4, endian="<")
-    out_uint32s2 = unpack_uint32(bytes_2mod4, endian="<")
-    references = [x for x in out_uint32s1 + out_uint32s2 if x in field_ids]
+    # check for references, unless there is nothing to refer to, or they
+    #   won't be printed and the caller doesn't need them
+    if field_ids and (need_refs or not quiet):
+        bytes_0mod4 = field_payload[0 : len(field_payload) // 4 * 4]
+        bytes_2mod4 = field_payload[2 : 2 + (len(field_payload) - 2) // 4 * 4]
+        out_uint32s1 = unpack_uint32(bytes_0mod4, endian="<")
+        out_uint32s2 = unpack_uint32(bytes_2mod4, endian="<")
+        # filter() does the membership tests in C, no Python-level loop
+        references = list(
+            filter(
+                field_ids.__contains__, itertools.chain(out_uint32s1, out_uint32s2)
+            )
+        )
+    else:
+        # nothing to refer to, don't unpack the payload just to find that
+        references = []
     if references and not quiet:
         print("Links to: ", end="", file=file)
         for ref in references:
@@ -422,7 +463,7 @@ def process_payload_type16(field_payload, file=sys.stdout):
         ["8-%d" % field_end, "ASCII", "Null-terminated\n  string", out_string[:-1]],
     ]
 
-    print(AsciiTable(byte_table_data).table, file=file)
+    print(ascii_table(byte_table_data), file=file)
 
     if not is_valid_string(field_payload):
         # some byte does not resolve to valid utf-8 character
@@ -462,7 +503,7 @@ def process_payload_blockptr(field_payload, field_type, file=sys.stdout):
         ["16-19", "uint16", "Unknown", print_list_simple(uint16s[-2:], bits=16)],
     ]
 
-    print(AsciiTable(byte_table_data).table, file=file)
+    print(ascii_table(byte_table_data), file=file)
 
 
 def summarize_ref(field_id, field_ids):
@@ -604,7 +645,7 @@ def process_payload_type100(
         # get rid of last "----" row
         del byte_table_data[-1]
 
-        print(AsciiTable(byte_table_data).table, file=file)
+        print(ascii_table(byte_table_data), file=file)
 
     field_info_payload["regions"] = field_payload_regions
 
@@ -711,7 +752,7 @@ def process_payload_type101(
         # get rid of last "----" row
         del byte_table_data[-1]
 
-        print(AsciiTable(byte_table_data).table, file=file)
+        print(ascii_table(byte_table_data), file=file)
 
     field_info_payload["items"] = field_payload_items
 
@@ -791,7 +832,7 @@ def process_payload_type102(
             ["", "", "", "(%s)" % ref_label],
         ]
 
-        print(AsciiTable(byte_table_data).table, file=file)
+        print(ascii_table(byte_table_data), file=file)
 
     return field_info_payload
 
@@ -851,7 +892,7 @@ def process_payload_type131(field_payload, field_ids=None, file=sys.stdout):
     # get rid of last "----" row
     del byte_table_data[-1]
 
-    print(AsciiTable(byte_table_data).table, file=file)
+    print(ascii_table(byte_table_data), file=file)
 
 
 def get_payload_ref_idx(field_payload, field_ids):
@@ -924,7 +965,7 @@ def process_payload_generic_refs_data(
                 ],
                 ["", "", "", "(%s)" % ref_string],
             ]
-            print(AsciiTable(byte_table_data).table, file=file)
+            print(ascii_table(byte_table_data), file=file)
         else:
             break
 
@@ -1015,7 +1056,7 @@ def process_datablock_header(header_bytes, byte_idx, block_num, file=sys.stdout)
     ]
     byte_table_data.extend(byte_table_datitem)
 
-    print(AsciiTable(byte_table_data).table, file=file)
+    print(ascii_table(byte_table_data), file=file)
 
 
 def process_datablock_footer(footer_bytes, byte_idx, block_num, file=sys.stdout):
@@ -1068,7 +1109,7 @@ def process_datablock_footer(footer_bytes, byte_idx, block_num, file=sys.stdout)
     # get rid of last "----" row
     del byte_table_data[-1]
 
-    print(AsciiTable(byte_table_data).table, file=file)
+    print(ascii_table(byte_table_data), file=file)
 
 
 def print_datablock(
@@ -1103,6 +1144,7 @@ def print_datablock(
             field_ids=field_ids,
             file=file,
             report_strings=report_strings,
+            need_refs=False,
         )
 
         if field_info["type"] == 0:
@@ -1180,7 +1222,7 @@ def process_file_header(in_bytes, file=sys.stdout):
 
     print("File Header", file=file)
     print("byte_idx = " + repr(0), file=file)
-    print(AsciiTable(byte_table_data).table, file=file)
+    print(ascii_table(byte_table_data), file=file)
 
     data_start0 = uint32_list[3]
 
@@ -1236,6 +1278,7 @@ def report_whole_file(
             field_ids=field_ids,
             file=out_fh,
             report_strings=report_strings,
+            need_refs=False,
         )
 
         if field_info["type"] == 0:
@@ -1450,61 +1493,70 @@ def parse_file(filename, report_strings=True):
     print(filename, file=sys.stderr)
 
     filename = os.path.realpath(filename)
-    (fileroot, _) = os.path.splitext(filename)
-    out_filedir = fileroot + "_reports"
-    try:
-        os.mkdir(out_filedir)
-    except FileExistsError:
-        pass
 
+    # map the file instead of reading it all into memory, slices of the
+    #   mmap are read from the page cache as they are needed
     with open(filename, "rb") as in_fh:
-        in_bytes = in_fh.read()
+        try:
+            in_bytes = mmap.mmap(in_fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap cannot map an empty file
+            raise biorad1sc_reader.BioRadInvalidFileError("Empty file")
+
+    # the mmap is closed even if a pass fails
+    with in_bytes:
+        (fileroot, _) = os.path.splitext(filename)
+        out_filedir = fileroot + "_reports"
+        try:
+            os.mkdir(out_filedir)
+        except FileExistsError:
+            pass
 
-    # SEARCH DEBUG
-    # search_backwards(in_bytes, len(in_bytes)-1, min_search_idx=59881)
-    # exit()
+        # SEARCH DEBUG
+        # search_backwards(in_bytes, len(in_bytes)-1, min_search_idx=59881)
+        # exit()
 
-    # dict of keys: field_ids, items: field_payloads
-    field_ids = {}
+        # dict of keys: field_ids, items: field_payloads
+        field_ids = {}
 
-    # PASS 1
-    #   get all field info
-    print("    Pass 1: getting Field IDs, pointers", file=sys.stderr)
-    (field_ids, data_start, data_len, is_referenced) = get_all_field_info(
-        in_bytes, field_ids
-    )
+        # PASS 1
+        #   get all field info
+        print("    Pass 1: getting Field IDs, pointers", file=sys.stderr)
+        (field_ids, data_start, data_len, is_referenced) = get_all_field_info(
+            in_bytes, field_ids
+        )
 
-    # PASS 2
-    #   report on whole file to dump.txt
-    print("    Pass 2: Reporting entire file to dump.txt", file=sys.stderr)
-    report_whole_file(
-        in_bytes,
-        field_ids,
-        data_start,
-        data_len,
-        filename,
-        out_filedir,
-        report_strings=report_strings,
-    )
+        # PASS 2
+        #   report on whole file to dump.txt
+        print("    Pass 2: Reporting entire file to dump.txt", file=sys.stderr)
+        report_whole_file(
+            in_bytes,
+            field_ids,
+            data_start,
+            data_len,
+            filename,
+            out_filedir,
+            report_strings=report_strings,
+        )
 
-    # PASS 3
-    #   report data blocks in separate files
-    print("    Pass 3: Reporting data blocks to separate files", file=sys.stderr)
-    report_datablocks(
-        in_bytes,
-        data_start,
-        data_len,
-        field_ids,
-        out_filedir,
-        filename,
-        report_strings=report_strings,
-    )
+        # PASS 3
+        #   report data blocks in separate files
+        print("    Pass 3: Reporting data blocks to separate files", file=sys.stderr)
+        report_datablocks(
+            in_bytes,
+            data_start,
+            data_len,
+            field_ids,
+            out_filedir,
+            filename,
+            report_strings=report_strings,
+        )
 
-    # PASS 4
-    #   report on hierarchy using biorad1sc_reader
-    print("    Pass 4: Reporting hierarchical data to hierarchy.txt ", file=sys.stderr)
-    print("            (using biorad1sc_reader)", file=sys.stderr)
-    report_hierarchy(filename, out_filedir)
+        # PASS 4
+        #   report on hierarchy using biorad1sc_reader
+        print("    Pass 4: Reporting hierarchical data to hierarchy.txt ", file=sys.stderr)
+        print("            (using biorad1sc_reader)", file=sys.stderr)
+        report_hierarchy(filename, out_filedir)
 
 
 def get_cmdline_args():
@@ -1542,9 +1594,14 @@ def get_cmdline_args():
 
 def main():
     args = get_cmdline_args()
+    status = 0
     for filename in args.srcfile:
-        parse_file(filename, report_strings=not args.omit_strings)
-    return 0
+        try:
+            parse_file(filename, report_strings=not args.omit_strings)
+        except biorad1sc_reader.BioRadInvalidFileError as err:
+            print("    Error: %s" % err, file=sys.stderr)
+            status = 1
+    return status
 
 
 def entry_point():
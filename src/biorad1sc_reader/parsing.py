@@ -10,6 +10,38 @@ import time
 import struct
 from biorad1sc_reader.constants import REGION_DATA_TYPES, REGION_DATA_TYPE_BYTES
 
+# compiled struct.Struct objects, keyed by format string
+_STRUCT_CACHE = {}
+
+# 16-byte Field Type 102 payload:
+#   num_items, collection_ref, ref_label
+TYPE102_STRUCT = struct.Struct("<6xHII")
+# one 20-byte Field Type 101 item:
+#   data field type, num_regions, data_key_ref, total_bytes, ref_label
+TYPE101_ITEM_STRUCT = struct.Struct("<H4xHIII")
+# one 36-byte Field Type 100 region:
+#   data_type, index, num_words, byte_offset, ref_label, word_size,
+#   ref_field_type
+TYPE100_ITEM_STRUCT = struct.Struct("<HHIII4xI2xH8x")
+
+# all bytes that is_ascii() accepts: NULL, TAB, LF, CR, printable ASCII
+ASCII_OK_BYTES = bytes([0, 9, 10, 13] + list(range(32, 127)))
+
+
+def _get_struct(fmt):
+    """Return a compiled struct.Struct for fmt, compiling it only once
+
+    Args:
+        fmt (str): struct format string, e.g. "<4H"
+
+    Returns:
+        struct.Struct: compiled Struct for fmt
+    """
+    compiled = _STRUCT_CACHE.get(fmt)
+    if compiled is None:
+        compiled = _STRUCT_CACHE[fmt] = struct.Struct(fmt)
+    return compiled
+
 
 def is_ascii(byte_stream):
     """Determine if all bytes in a bytes object are "good" ASCII
@@ -26,8 +58,33 @@ def is_ascii(byte_stream):
         False otherwise.
 
     """
-    ok_ascii_byte = [0, 9, 10, 13] + list(range(32, 127))
-    return all([byte in ok_ascii_byte for byte in byte_stream])
+    # delete every ok byte, anything left over is not ok
+    return not bytes(byte_stream).translate(None, ASCII_OK_BYTES)
+
+
+def get_label(field_ids, ref_label):
+    """Return decoded label string of a referenced Field Type 16
+
+    The decoded string is stored in the referenced field's info dict under
+    'label_str', so each label is only decoded once no matter how many
+    fields refer to it.
+
+    Args:
+        field_ids (dict): keys of Field IDs (uint32 numbers) and items
+            which are dicts containing all information on that field
+            instance
+        ref_label (int): uint32 Field ID of a Field Type 16
+
+    Returns:
+        str: label string, with trailing NULLs removed
+    """
+    label_info = field_ids[ref_label]
+    label = label_info.get("label_str")
+    if label is None:
+        label = bytes(label_info["payload"]).rstrip(b"\x00")
+        label = label.decode("utf-8", "ignore")
+        label_info["label_str"] = label
+    return label
 
 
 def unpack_string(byte_stream):
@@ -60,7 +117,7 @@ def unpack_double(byte_stream, endian="<"):
         list: unpacked double numbers
     """
     num_double = len(byte_stream) // 8
-    out_double = struct.unpack(endian + "d" * num_double, byte_stream)
+    out_double = _get_struct("%s%dd" % (endian, num_double)).unpack(byte_stream)
     return out_double
 
 
@@ -79,7 +136,7 @@ def unpack_uint16(byte_stream, endian="<"):
         list: unpacked uint16 numbers
     """
     num_uint16 = len(byte_stream) // 2
-    out_uint16s = struct.unpack(endian + "H" * num_uint16, byte_stream)
+    out_uint16s = _get_struct("%s%dH" % (endian, num_uint16)).unpack(byte_stream)
     return out_uint16s
 
 
@@ -98,7 +155,7 @@ def unpack_uint32(byte_stream, endian="<"):
         list: unpacked uint32 numbers
     """
     num_uint32 = len(byte_stream) // 4
-    out_uint32s = struct.unpack(endian + "I" * num_uint32, byte_stream)
+    out_uint32s = _get_struct("%s%dI" % (endian, num_uint32)).unpack(byte_stream)
     return out_uint32s
 
 
@@ -117,7 +174,7 @@ def unpack_uint64(byte_stream, endian="<"):
         list: unpacked uint64 numbers
     """
     num_uint64 = len(byte_stream) // 8
-    out_uint64s = struct.unpack(endian + "Q" * num_uint64, byte_stream)
+    out_uint64s = _get_struct("%s%dQ" % (endian, num_uint64)).unpack(byte_stream)
     return out_uint64s
 
 
@@ -128,7 +185,7 @@ def process_payload_type102(field_payload, field_ids=None):
     and return and informational dict.
 
     Args:
-        field_payload (bytes): all the contents of a Field Type 102
+        field_payload (bytes or memoryview): all the contents of a Field Type 102
             after the header bytes
         field_ids (dict): keys of Field IDs (uint32 numbers) and items
             which are dicts containing all information on that field
@@ -149,18 +206,15 @@ def process_payload_type102(field_payload, field_ids=None):
 
     assert len(field_payload) == 16, "Field Type 102 should have length of 20"
 
-    uint16s = unpack_uint16(field_payload, endian="<")
-    uint32s = unpack_uint32(field_payload, endian="<")
-    ref_label = uint32s[3]
-    collection_label = field_ids[ref_label]["payload"].rstrip(b"\x00")
-    collection_label = collection_label.decode("utf-8", "ignore")
+    (num_items, collection_ref, ref_label) = TYPE102_STRUCT.unpack(field_payload)
+    collection_label = get_label(field_ids, ref_label)
 
     # number of items in this collection
-    field_info_payload["collection_num_items"] = uint16s[3]
+    field_info_payload["collection_num_items"] = num_items
     # label for this collection
     field_info_payload["collection_label"] = collection_label
     # reference to next field type 101
-    field_info_payload["collection_ref"] = uint32s[2]
+    field_info_payload["collection_ref"] = collection_ref
 
     return field_info_payload
 
@@ -173,7 +227,7 @@ def process_payload_type101(field_payload, field_ids=None):
     information dict.
 
     Args:
-        field_payload (bytes): all the contents of a Field Type 101
+        field_payload (bytes or memoryview): all the contents of a Field Type 101
             after the header bytes
         field_ids (dict): keys of Field IDs (uint32 numbers) and items
             which are dicts containing all information on that field
@@ -214,36 +268,31 @@ def process_payload_type101(field_payload, field_ids=None):
     # every 20 bytes is a new Data Item
     # each uint at bytes 8-11 + 20*N is a reference
     # each uint at bytes 16-19 + 20*N is a reference
-    ditem_len = 20
-
-    num_data_items = len(field_payload) // ditem_len
-
-    uint16s = unpack_uint16(field_payload, endian="<")
-    uint32s = unpack_uint32(field_payload, endian="<")
-
-    for i in range(num_data_items):
-        u16start = i * (ditem_len // 2)
-        u32start = i * (ditem_len // 4)
-
-        ref_label = uint32s[u32start + 4]
-        item_label = field_ids[ref_label]["payload"].rstrip(b"\x00")
-        item_label = item_label.decode("utf-8", "ignore")
-
-        data_field_type = uint16s[u16start]
+    # unpack each Data Item's fields directly, one tuple per item
+    #   (any trailing partial item is ignored)
+    for i in range(len(field_payload) // TYPE101_ITEM_STRUCT.size):
+        (
+            data_field_type,
+            num_regions,
+            data_key_ref,
+            total_bytes,
+            ref_label,
+        ) = TYPE101_ITEM_STRUCT.unpack_from(field_payload, i * TYPE101_ITEM_STRUCT.size)
+        item_label = get_label(field_ids, ref_label)
 
         assert (
             field_payload_items.get(data_field_type, False) is False
         ), "Field Type 101: multiple entries, same data field type"
 
         field_payload_items[data_field_type] = {}
-        field_payload_items[data_field_type]["num_regions"] = uint16s[u16start + 3]
-        field_payload_items[data_field_type]["data_key_ref"] = uint32s[u32start + 2]
-        field_payload_items[data_field_type]["total_bytes"] = uint32s[u32start + 3]
+        field_payload_items[data_field_type]["num_regions"] = num_regions
+        field_payload_items[data_field_type]["data_key_ref"] = data_key_ref
+        field_payload_items[data_field_type]["total_bytes"] = total_bytes
         field_payload_items[data_field_type]["label"] = item_label
 
         # put indicator in id for data_key as to total bytes explained
         #   by data key, in case it is missing the word_size bytes
-        field_ids[uint32s[u32start + 2]]["data_key_total_bytes"] = uint32s[u32start + 3]
+        field_ids[data_key_ref]["data_key_total_bytes"] = total_bytes
 
     field_info_payload["items"] = field_payload_items
 
@@ -308,7 +357,7 @@ def process_payload_type100(field_payload, data_key_total_bytes, field_ids=None)
     dict containing region info.
 
     Args:
-        field_payload (bytes): all the contents of a Field Type 100
+        field_payload (bytes or memoryview): all the contents of a Field Type 100
             after the header bytes
         field_ids (dict): keys of Field IDs (uint32 numbers) and items
             which are dicts containing all information on that field
@@ -353,34 +402,33 @@ def process_payload_type100(field_payload, data_key_total_bytes, field_ids=None)
 
     # every 36 bytes is a new Data Item
     # each uint at bytes 12-15 + 36*N is a reference to Field Type 16
-    ditem_len = 36
-
-    num_data_items = len(field_payload) // ditem_len
-
-    uint16s = unpack_uint16(field_payload, endian="<")
-    uint32s = unpack_uint32(field_payload, endian="<")
-
+    # unpack each Data Item's fields directly, one tuple per item
+    #   (any trailing partial item is ignored)
     byte_offsets = []
     has_wordsize_zero = False
-    for i in range(num_data_items):
-        u16start = i * (ditem_len // 2)
-        u32start = i * (ditem_len // 4)
-
-        ref_label = uint32s[u32start + 3]
-        region_label = field_ids[ref_label]["payload"].rstrip(b"\x00")
-        region_label = region_label.decode("utf-8", "ignore")
+    for i in range(len(field_payload) // TYPE100_ITEM_STRUCT.size):
+        (
+            data_type,
+            index,
+            num_words,
+            byte_offset,
+            ref_label,
+            word_size,
+            ref_field_type,
+        ) = TYPE100_ITEM_STRUCT.unpack_from(field_payload, i * TYPE100_ITEM_STRUCT.size)
+        region_label = get_label(field_ids, ref_label)
 
         field_payload_regions[i] = {}
-        field_payload_regions[i]["data_type"] = uint16s[u16start]
+        field_payload_regions[i]["data_type"] = data_type
         field_payload_regions[i]["label"] = region_label
-        field_payload_regions[i]["index"] = uint16s[u16start + 1]
-        field_payload_regions[i]["num_words"] = uint32s[u32start + 1]
-        field_payload_regions[i]["byte_offset"] = uint32s[u32start + 2]
-        field_payload_regions[i]["word_size"] = uint32s[u32start + 5]
-        field_payload_regions[i]["ref_field_type"] = uint16s[u16start + 13]
-
-        byte_offsets.append(field_payload_regions[i]["byte_offset"])
-        if uint32s[u32start + 5] == 0:
+        field_payload_regions[i]["index"] = index
+        field_payload_regions[i]["num_words"] = num_words
+        field_payload_regions[i]["byte_offset"] = byte_offset
+        field_payload_regions[i]["word_size"] = word_size
+        field_payload_regions[i]["ref_field_type"] = ref_field_type
+
+        byte_offsets.append(byte_offset)
+        if word_size == 0:
             has_wordsize_zero = True
 
     if has_wordsize_zero:
@@ -392,17 +440,33 @@ def process_payload_type100(field_payload, data_key_total_bytes, field_ids=None)
     return field_info_payload
 
 
+# unpack function for each numeric Region Data Type (see REGION_DATA_TYPES)
+REGION_UNPACKERS = {
+    3: unpack_uint16,
+    4: unpack_uint16,
+    5: unpack_uint32,
+    6: unpack_uint32,
+    7: unpack_uint64,
+    9: unpack_uint32,
+    10: unpack_double,
+    15: unpack_uint32,
+    17: unpack_uint32,
+    21: unpack_uint32,
+}
+
+
 def process_data_region(region, payload, field_ids, field_types, visited_ids):
     """Process one region of one data container field.
 
     Args:
         region (dict): info from datakey about the format of this region
-        payload (bytes): bytes of the payload just for this region
+        payload (bytes or memoryview): bytes of the payload just for this
+            region
         field_ids (dict): keys are Field IDs, items are dicts containing
             all data for that Field instance
         field_types (dict): explanation of each Field Type from 'items'
             returned from process_payload_type101
-        visited_ids (list): uint32 Field IDs of fields that have been visited
+        visited_ids (set): uint32 Field IDs of fields that have been visited
 
     Returns:
         dict: comprised of the following structure::
@@ -419,7 +483,8 @@ def process_data_region(region, payload, field_ids, field_types, visited_ids):
     region_data = {}
     data_region_start = region["byte_offset"]
     data_region_end = region["byte_offset"] + region["word_size"] * region["num_words"]
-    data_raw = payload[data_region_start:data_region_end]
+    # payload may be a memoryview, keep only this region's bytes
+    data_raw = bytes(payload[data_region_start:data_region_end])
     region_data["raw"] = data_raw
 
     # DEBUG DELETEME
@@ -432,7 +497,10 @@ def process_data_region(region, payload, field_ids, field_types, visited_ids):
     data_proc = None
     data_interp = None
 
-    if region["data_type"] in [1, 2]:
+    data_type = region["data_type"]
+    unpacker = REGION_UNPACKERS.get(data_type)
+
+    if data_type in (1, 2):
         # byte / ASCII
         if len(data_raw) > 1 and is_ascii(data_raw):
             data_proc = data_raw.rstrip(b"\x00").decode("utf-8", "ignore")
@@ -440,36 +508,28 @@ def process_data_region(region, payload, field_ids, field_types, visited_ids):
             # tuple equiv. to unpack_uint8
             data_proc = tuple(data_raw)
             data_proc = data_proc[0] if len(data_proc) == 1 else data_proc
-    elif region["data_type"] in [3, 4]:
-        # u?int16
-        data_proc = unpack_uint16(data_raw, endian="<")
+    elif unpacker is not None:
+        # u?int16, u?int32, uint64, double (float), or uint32 Reference
+        data_proc = unpacker(data_raw, endian="<")
         data_proc = data_proc[0] if len(data_proc) == 1 else data_proc
-    elif region["data_type"] in [5, 6, 9, 21]:
+    else:
+        pass
+        # TODO: make generic data types work based on word_size?
+        # print("Data Type "+ repr(region['data_type']) + " is Unknown",
+        #        file=sys.stderr)
+        # print("  word_size: " + repr(region['word_size']))
+        # print("  num_words: " + repr(region['num_words']))
+
+    if data_type in (5, 6, 9, 21):
         # u?int32
-        data_proc = unpack_uint32(data_raw, endian="<")
-        data_proc = data_proc[0] if len(data_proc) == 1 else data_proc
         if region["label"].endswith("time"):
             data_interp = time.asctime(time.gmtime(data_proc)) + " UTC"
-    elif region["data_type"] in [
-        7,
-    ]:
-        # u?int64
-        data_proc = unpack_uint64(data_raw, endian="<")
-        data_proc = data_proc[0] if len(data_proc) == 1 else data_proc
-    elif region["data_type"] in [
-        10,
-    ]:
-        # double (float)
-        data_proc = unpack_double(data_raw, endian="<")
-        data_proc = data_proc[0] if len(data_proc) == 1 else data_proc
-    elif region["data_type"] in [15, 17]:
+    elif data_type in (15, 17):
         # uint32 Reference
-        data_proc = unpack_uint32(data_raw, endian="<")
-        data_proc = data_proc[0] if len(data_proc) == 1 else data_proc
         this_ref = data_proc
         if this_ref != 0:
             if field_ids[this_ref]["type"] == 16:
-                region_str = field_ids[this_ref]["payload"][:-1]
+                region_str = bytes(field_ids[this_ref]["payload"][:-1])
                 data_interp = region_str.decode("utf-8", "ignore")
             else:
                 field_info_ref = field_ids[this_ref]
@@ -483,16 +543,9 @@ def process_data_region(region, payload, field_ids, field_types, visited_ids):
                 data_interp["id"] = field_info_ref["id"]
                 data_interp["type"] = field_info_ref["type"]
 
-                visited_ids.append(field_info_ref["id"])
+                visited_ids.add(field_info_ref["id"])
         else:
             data_interp = None
-    else:
-        pass
-        # TODO: make generic data types work based on word_size?
-        # print("Data Type "+ repr(region['data_type']) + " is Unknown",
-        #        file=sys.stderr)
-        # print("  word_size: " + repr(region['word_size']))
-        # print("  num_words: " + repr(region['num_words']))
 
     region_data["proc"] = data_proc
     region_data["interp"] = data_interp
@@ -512,7 +565,7 @@ def process_payload_data_container(field_info, field_types, field_ids, visited_i
             returned from process_payload_type101
         field_ids (dict): keys are Field IDs, items are dicts containing
             all data for that Field instance
-        visited_ids (list): keeps track of all Field IDs that have been
+        visited_ids (set): keeps track of all Field IDs that have been
             processed into the hierarchical output data
 
     Returns:
@@ -5,14 +5,16 @@ Main reader module for Bio-Rad 1sc files.  Includes public API class
 Reader.
 """
 
-# import sys
+import sys
 import os.path
+import array
+import bisect
+import concurrent.futures
+import functools
+import mmap
 import struct
-from PIL import Image
 from biorad1sc_reader.parsing import (
     unpack_string,
-    unpack_uint16,
-    unpack_uint32,
     process_payload_type102,
     process_payload_type101,
     process_payload_type100,
@@ -30,15 +32,98 @@ else:
 
 # import tictoc
 
+# translation table to invert all bits of every byte
+INVERT_BYTE_TABLE = bytes(255 - x for x in range(256))
+
+# single little-endian values in the file header
+UINT16_STRUCT = struct.Struct("<H")
+UINT32_STRUCT = struct.Struct("<I")
+# field header: uint16 Field Type, uint16 Field Length, uint32 Field ID
+FIELD_HEADER_STRUCT = struct.Struct("<HHI")
+# 20-byte Data Block pointer field in file header: field header, then
+#   uint32 Data Block start, uint32 Data Block length, 4 unknown bytes
+BLOCK_PTR_STRUCT = struct.Struct("<HHIII4x")
+
+# TIFF IFD entry field types, and the number of IFD entries we write
+TIFF_SHORT = 3
+TIFF_LONG = 4
+TIFF_NUM_IFD_ENTRIES = 10
+# TIFF header + IFD (entry count, entries, next IFD offset)
+TIFF_HEADER_LEN = 8 + 2 + 12 * TIFF_NUM_IFD_ENTRIES + 4
+
+
+def _make_u16_tiff_header(size):
+    """Make all the bytes of a TIFF file that come before the image data
+
+    Makes a little-endian baseline TIFF header and a single IFD describing
+    an uncompressed 16-bit grayscale image stored in one strip, which
+    starts immediately after the returned bytes.
+
+    Args:
+        size (tuple): (xsize, ysize) where xsize and ysize are integers
+            specifying the size of the image in pixels
+
+    Returns:
+        bytes: TIFF header and IFD, TIFF_HEADER_LEN bytes long
+    """
+    (xsize, ysize) = size
+    # (tag, field type, value), tags must be in ascending order
+    ifd_entries = [
+        (256, TIFF_LONG, xsize),  # ImageWidth
+        (257, TIFF_LONG, ysize),  # ImageLength
+        (258, TIFF_SHORT, 16),  # BitsPerSample
+        (259, TIFF_SHORT, 1),  # Compression: none
+        (262, TIFF_SHORT, 1),  # PhotometricInterpretation: BlackIsZero
+        (273, TIFF_LONG, TIFF_HEADER_LEN),  # StripOffsets
+        (277, TIFF_SHORT, 1),  # SamplesPerPixel
+        (278, TIFF_LONG, ysize),  # RowsPerStrip
+        (279, TIFF_LONG, 2 * xsize * ysize),  # StripByteCounts
+        (339, TIFF_SHORT, 1),  # SampleFormat: unsigned integer
+    ]
+    assert len(ifd_entries) == TIFF_NUM_IFD_ENTRIES
+
+    # "II" = little-endian, 42 = TIFF, IFD starts right after header
+    header = [struct.pack("<2sHI", b"II", 42, 8)]
+    header.append(struct.pack("<H", TIFF_NUM_IFD_ENTRIES))
+    for (tag, field_type, value) in ifd_entries:
+        if field_type == TIFF_SHORT:
+            # SHORT values are left-justified in the 4-byte value field
+            header.append(struct.pack("<HHIH2x", tag, field_type, 1, value))
+        else:
+            header.append(struct.pack("<HHII", tag, field_type, 1, value))
+    # offset of next IFD, 0 means no more IFDs
+    header.append(struct.pack("<I", 0))
+
+    return b"".join(header)
+
+
+def _u16_bytes_to_list(u16_bytes):
+    """Convert little-endian uint16 bytes to a list of ints
+
+    Args:
+        u16_bytes (bytes or bytearray): little-endian uint16 data
+
+    Returns:
+        list: uint16 numbers
+    """
+    # array.array unpacks everything in C, in native byte order
+    u16_array = array.array("H", u16_bytes)
+    if sys.byteorder != "little":
+        u16_array.byteswap()
+    return u16_array.tolist()
+
 
 def save_u16_to_tiff(u16in, size, tiff_filename):
     """Save 16-bit uints to TIFF image file
 
     Since Pillow has poor support for 16-bit TIFF, we make our own
-    save function to properly save a 16-bit TIFF.
+    save function to properly save a 16-bit TIFF.  The TIFF header is
+    written by hand and followed directly by the image data, so no
+    imaging library is needed.
 
     Args:
-        u16in (list): u16int image pixel data
+        u16in (list, numpy.ndarray, or bytearray): u16int image pixel data,
+            bytes/bytearray must already be little-endian uint16 data
         size (tuple): (xsize, ysize) where xsize and ysize are integers
             specifying the size of the image in pixels
         tiff_filename (str): filepath for the output TIFF file
@@ -50,18 +135,23 @@ def save_u16_to_tiff(u16in, size, tiff_filename):
     # mytimer = tictoc.Timer()
     # write 16-bit TIFF image
 
-    # PIL interprets mode 'I;16' as "uint16, little-endian"
-    img_out = Image.new("I;16", size)
-
-    if HAS_NUMPY:
-        # make sure u16in little-endian, output bytes
-        outpil = u16in.astype(u16in.dtype.newbyteorder("<")).tobytes()
+    if isinstance(u16in, (bytes, bytearray)):
+        # already little-endian u16 bytes
+        out_bytes = u16in
+    elif HAS_NUMPY:
+        # make sure u16in little-endian, only copying if it isn't already
+        #   (arrays support the buffer protocol, so no tobytes() needed)
+        out_bytes = np.ascontiguousarray(
+            u16in.astype(u16in.dtype.newbyteorder("<"), copy=False)
+        )
     else:
         # little-endian u16 format
         # TODO: is it ok to use *args with huge len(args) ??
-        outpil = struct.pack("<%dH" % (len(u16in)), *u16in)
-    img_out.frombytes(outpil)
-    img_out.save(tiff_filename)
+        out_bytes = struct.pack("<%dH" % (len(u16in)), *u16in)
+
+    with open(tiff_filename, "wb") as tiff_fh:
+        tiff_fh.write(_make_u16_tiff_header(size))
+        tiff_fh.write(out_bytes)
     # mytimer.eltime_pr("save_u16_to_tiff END\t")
 
 
@@ -94,12 +184,17 @@ class Reader:
         self.collections = None
         self.data_start = None
         self.data_len = None
+        self.data_ends = None
+        self.data_end_blocks = None
         self.filename = None
         self.filedir = None
         self.in_bytes = None
+        self.in_view = None
         self.img_size_x = None
         self.img_size_y = None
         self.img_data = None
+        self.img_data_inv = None
+        self.img_summary = None
         # TODO: find endian (now we just assume little-endian)
         # "<" = little-endian, ">" = big-endian
         self.endian = "<"
@@ -112,14 +207,52 @@ class Reader:
 
     def reset(self):
         """Reset all internal state.  (Must load file afterwards.)"""
+        self.close()
         self.__init__()
 
+    def close(self):
+        """Release the memory-mapped 1sc file opened by open_file().
+
+        Data already extracted from the file remains available, e.g.
+        get_metadata(), get_img_data() and save_img_as_tiff() still work
+        if they were called before close().  Anything that still needs to
+        read the file raises ValueError until a file is loaded again.
+        """
+        # the memoryview must be released before its mmap can be closed
+        if self.in_view is not None:
+            self.in_view.release()
+        self.in_view = None
+        if isinstance(self.in_bytes, mmap.mmap):
+            try:
+                self.in_bytes.close()
+            except BufferError:
+                # views into the file are still alive (e.g. in the traceback
+                #   of an error being raised), the mmap is closed when they
+                #   are garbage-collected instead
+                pass
+        self.in_bytes = None
+
     def refresh(self):
         """Reset and refresh all internal state using same input 1sc file."""
+        self.close()
         self.__init__(self.filename)
 
+    def _check_loaded(self):
+        """Raise ValueError if there is no 1sc file data to read from"""
+        if self.in_bytes is None:
+            raise ValueError(
+                "No 1sc file loaded: Reader was closed or never given a file"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Release the memory-mapped 1sc file on leaving a with block."""
+        self.close()
+
     def open_file(self, in_filename):
-        """Open file and read into memory.
+        """Open file and memory-map it for reading.
 
         Raises Errors if File is not valid 1sc file.
 
@@ -138,8 +271,22 @@ class Reader:
         self.filename = os.path.realpath(in_filename)
         self.filedir = os.path.dirname(self.filename)
 
+        # memory-map the file instead of reading it all into memory, only
+        #   the parts of the file we actually parse get paged in
         with open(self.filename, "rb") as in_fh:
-            self.read_stream(in_fh)
+            try:
+                self.in_bytes = mmap.mmap(in_fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # mmap refuses empty files
+                raise BioRadInvalidFileError("Empty file")
+        # slices of a memoryview don't copy the bytes they refer to
+        self.in_view = memoryview(self.in_bytes)
+
+        # test magic number of file, get pointers to start, len of all major
+        #   data blocks in file
+        #   from info at top of file
+        # raises Error if something is not right
+        self._parse_file_header()
 
     def read_stream(self, in_fh):
         """Read file-like object into memory.
@@ -155,6 +302,10 @@ class Reader:
             BioRadInvalidFileError if file is not a valid Bio-Rad 1sc file
         """
         self.in_bytes = in_fh.read()
+        if not self.in_bytes:
+            # same error as open_file() gives for an empty file
+            raise BioRadInvalidFileError("Empty file")
+        self.in_view = memoryview(self.in_bytes)
 
         # test magic number of file, get pointers to start, len of all major
         #   data blocks in file
@@ -204,7 +355,9 @@ class Reader:
 
             image_data is
             a list of uint16 numbers comprising the image data starting
-            from upper-left and progressing to lower-right.
+            from upper-left and progressing to lower-right.  If numpy is
+            available, image_data is instead a 1-D numpy.ndarray of uint16,
+            in the same order.
 
         """
         # when extracting from file:
@@ -213,58 +366,158 @@ class Reader:
         # print("get_img_data START")
         # mytimer = tictoc.Timer()
 
-        if self.img_size_x or self.img_size_y is None:
+        if self.img_size_x is None or self.img_size_y is None:
             self._get_img_size()
 
-        if self.img_data is None:
-            img_start = self.data_start[10]
-            img_end = self.data_start[10] + self.data_len[10]
-
+        # inverted image data is made straight from the file data below, so
+        #   only make the non-inverted image data if it is what's asked for
+        if self.img_data is None and not invert:
             if HAS_NUMPY:
-                # unsigned uint16s (2-bytes)
-                img_data = np.frombuffer(
-                    self.in_bytes[img_start:img_end],
-                    np.dtype("uint16").newbyteorder(self.endian),
-                )
-                # re-arrange image data so top-to-bottom
-                #   1sc makes botttom to top originally
-
-                # create index array
-                rowsz = int(self.img_size_x)
-                img_data_idx = np.zeros(len(img_data), dtype="uint32")
-                for row in range(0, len(img_data) // rowsz):
-                    img_data_idx[row * rowsz : (row + 1) * rowsz] = range(
-                        len(img_data) - (row + 1) * rowsz,
-                        len(img_data) - row * rowsz,
-                    )
-                # assign using index array
-                self.img_data = img_data[img_data_idx]
-
+                self.img_data = self._flip_vertical()
             else:
-                # little-endian unsigned uint16s (2-bytes)
-                img_data = list(
-                    struct.unpack(
-                        "%s%dH" % (self.endian, (img_end - img_start) / 2),
-                        self.in_bytes[img_start:img_end],
-                    )
-                )
-                # re-arrange image data so top-to-bottom
-                #   1sc makes botttom to top originally
-                self.img_data = []
-                for i in range(len(img_data), 0, -self.img_size_x):
-                    self.img_data = self.img_data + img_data[i - self.img_size_x : i]
+                # flip rows as raw bytes, then unpack all pixels at once
+                (_, _, img_bytes) = self._get_img_bytes()
+                self.img_data = _u16_bytes_to_list(img_bytes)
 
+        # inverted image data is kept too, so asking for it again (e.g. to
+        #   save both a plain and a scaled inverted TIFF) costs nothing
         if invert:
-            if HAS_NUMPY:
-                img_data = 2 ** 16 - 1 - self.img_data
-            else:
-                img_data = [2 ** 16 - 1 - x for x in self.img_data]
+            if self.img_data_inv is None:
+                if HAS_NUMPY:
+                    if self.img_data is None:
+                        # flip and invert in a single pass over the image
+                        self.img_data_inv = self._flip_vertical(invert=True)
+                    else:
+                        self.img_data_inv = 2 ** 16 - 1 - self.img_data
+                else:
+                    # invert bytes with a translation table, then unpack,
+                    #   instead of subtracting pixel by pixel in Python
+                    (_, _, img_bytes) = self._get_img_bytes(invert=True)
+                    self.img_data_inv = _u16_bytes_to_list(img_bytes)
+            img_data = self.img_data_inv
         else:
             img_data = self.img_data
 
         # mytimer.eltime_pr("get_img_data END\t")
         return (self.img_size_x, self.img_size_y, img_data)
 
+    def _will_need(self, start, end):
+        """Tell the OS we are about to read bytes start to end-1 of the file
+
+        Lets the OS read ahead the pages of a memory-mapped file we are
+        about to read all of, instead of faulting them in one at a time.
+        Does nothing if the file is not memory-mapped or if madvise is
+        not available (Python < 3.8, or platform without MADV_WILLNEED).
+
+        Args:
+            start (int): file byte offset of the first byte to be read
+            end (int): file byte offset after the last byte to be read
+        """
+        if not isinstance(self.in_bytes, mmap.mmap) or not hasattr(
+            mmap, "MADV_WILLNEED"
+        ):
+            return
+        # madvise needs a page-aligned start, and must stay inside the file
+        start_page = start - start % mmap.PAGESIZE
+        end = min(end, len(self.in_bytes))
+        self.in_bytes.madvise(mmap.MADV_WILLNEED, start_page, end - start_page)
+
+    def _flip_vertical(self, invert=False):
+        """Return numpy image data, re-arranged so rows are top-to-bottom
+
+        1sc files store the image rows bottom to top.  Requires numpy.
+
+        Args:
+            invert (bool, optional): True to invert the brightness scale of
+                output image data compared to 1sc image data (black <-> white)
+
+        Returns:
+            numpy.ndarray: 1-D uint16 image data starting from upper-left and
+            progressing to lower-right.
+        """
+        self._check_loaded()
+        img_start = self.data_start[10]
+        img_end = self.data_start[10] + self.data_len[10]
+        self._will_need(img_start, img_end)
+
+        # unsigned uint16s (2-bytes)
+        # view directly into in_bytes, no copy of image bytes
+        img_data = np.frombuffer(
+            self.in_bytes,
+            np.dtype("uint16").newbyteorder(self.endian),
+            count=(img_end - img_start) // 2,
+            offset=img_start,
+        )
+        # 2-D view with the order of rows reversed, still no copy
+        img_rows = img_data.reshape(-1, int(self.img_size_x))[::-1]
+
+        if invert:
+            # invert while copying the flipped rows
+            return np.subtract(2 ** 16 - 1, img_rows, dtype="uint16").ravel()
+
+        # ravel makes one contiguous copy
+        return img_rows.ravel()
+
+    def _iter_img_rows(self, invert=False):
+        """Yield image rows as raw little-endian uint16 bytes, top to bottom
+
+        Each row is read straight from the 1sc file data, so the whole
+        image never needs to be held in memory at once.
+
+        Args:
+            invert (bool, optional): True to invert the brightness scale of
+                output image data compared to 1sc image data (black <-> white)
+
+        Yields:
+            bytes-like: one row of little-endian uint16 image data
+        """
+        self._check_loaded()
+        if self.img_size_x is None or self.img_size_y is None:
+            self._get_img_size()
+
+        img_start = self.data_start[10]
+        img_end = self.data_start[10] + self.data_len[10]
+        rowbytes = 2 * self.img_size_x
+        self._will_need(img_start, img_end)
+
+        # 1sc stores rows bottom to top, so walk rows from the end
+        for row_end in range(img_end, img_start, -rowbytes):
+            row_bytes = self.in_view[row_end - rowbytes : row_end]
+
+            if self.endian != "<":
+                # swap bytes of every uint16 to make little-endian
+                row_bytes = bytearray(row_bytes)
+                (row_bytes[0::2], row_bytes[1::2]) = (row_bytes[1::2], row_bytes[0::2])
+
+            if invert:
+                # 2**16 - 1 - x for uint16 x is the same as inverting every
+                #   bit, so we can invert each byte independently
+                row_bytes = bytes(row_bytes).translate(INVERT_BYTE_TABLE)
+
+            yield row_bytes
+
+    def _get_img_bytes(self, invert=False):
+        """Return image data as raw little-endian uint16 bytes
+
+        Used when numpy is not available, where converting every pixel to a
+        Python int (and back again to save it) is slow.
+
+        Args:
+            invert (bool, optional): True to invert the brightness scale of
+                output image data compared to 1sc image data (black <-> white)
+
+        Returns:
+            tuple: (xsize, ysize, image_bytes) where xsize and ysize are
+            integers specifying the size of the image.
+
+            image_bytes is a bytearray of little-endian uint16 image data
+            starting from upper-left and progressing to lower-right.
+        """
+        # re-arrange image data so top-to-bottom, a whole row at a time
+        img_bytes = bytearray().join(self._iter_img_rows(invert=invert))
+
+        return (self.img_size_x, self.img_size_y, img_bytes)
+
     def save_img_as_tiff(self, tiff_filename, invert=False):
         """Save image data as TIFF image
 
@@ -280,10 +533,22 @@ class Reader:
         # print("save_img_as_tiff: START")
         # mytimer = tictoc.Timer()
 
-        (img_x, img_y, img_data) = self.get_img_data(invert=invert)
+        img_data = self.img_data_inv if invert else self.img_data
 
-        # save to tiff file
-        save_u16_to_tiff(img_data, (img_x, img_y), tiff_filename)
+        if img_data is not None:
+            # image data already read, save that
+            save_u16_to_tiff(
+                img_data, (self.img_size_x, self.img_size_y), tiff_filename
+            )
+        else:
+            # stream rows straight from the 1sc file to the TIFF file, no
+            #   need to hold the whole image in memory or unpack its pixels
+            self._check_loaded()
+            if self.img_size_x is None or self.img_size_y is None:
+                self._get_img_size()
+            with open(tiff_filename, "wb") as tiff_fh:
+                tiff_fh.write(_make_u16_tiff_header((self.img_size_x, self.img_size_y)))
+                tiff_fh.writelines(self._iter_img_rows(invert=invert))
 
         # mytimer.eltime_pr("save_img_as_tiff END\t")
 
@@ -315,19 +580,29 @@ class Reader:
         # print("save_img_as_tiff_sc START")
         # mytimer = tictoc.Timer()
 
+        # img_data is a numpy.ndarray if HAS_NUMPY, else a list
         (img_x, img_y, img_data) = self.get_img_data(invert=invert)
 
-        img_min = min(img_data)
-        img_max = max(img_data)
+        if HAS_NUMPY:
+            # numpy reductions, not Python-level iteration over the array
+            img_min = int(img_data.min())
+            img_max = int(img_data.max())
+            # lookup table needs an entry for every value up to img_max
+            lut_size = img_max + 1
+        else:
+            img_min = min(img_data)
+            img_max = max(img_data)
         img_span = img_max - img_min
 
         # scale min/max to scale brightness
-        if invert:
-            # anchor at img_max if inverted img data
-            img_min = img_max - img_span * imgsc
-        else:
-            # anchor at img_min if inverted img data
-            img_max = img_min + img_span * imgsc
+        #   (imgsc == 1.0 leaves img_min, img_max unchanged)
+        if imgsc != 1.0:
+            if invert:
+                # anchor at img_max if inverted img data
+                img_min = img_max - img_span * imgsc
+            else:
+                # anchor at img_min if inverted img data
+                img_max = img_min + img_span * imgsc
 
         if HAS_NUMPY:
             # scale brightness of pixels
@@ -338,14 +613,31 @@ class Reader:
             #       positive or negative
             # need 64-bit signed int, because we multiply 16-bit by 16-bit
             #   which can be maximum positive 32-bits
-            img_data = np.array(img_data, dtype="int64")
-            img_data_scale = (img_data - img_min) * (2 ** 16 - 1) / img_span
+            # scale every possible pixel value once into a lookup table
+            #   (at most 65536 entries), then look up every pixel in it
+            # each step below works in place on the one lookup table
+            if imgsc == 1.0:
+                # img_min-img_max is the actual data range, so every pixel
+                #   already maps inside 0-(2**16-1) and clipping is not
+                #   needed.  Integer division truncates the same as the
+                #   float division + uint16 cast below.
+                #   (table entries below img_min are never looked up)
+                lut = np.arange(lut_size, dtype="int64")
+                np.subtract(lut, img_min, out=lut)
+                np.multiply(lut, 2 ** 16 - 1, out=lut)
+                np.floor_divide(lut, img_span, out=lut)
+            else:
+                # img_min may be fractional here, so scale in float64
+                lut = np.arange(lut_size, dtype="float64")
+                np.subtract(lut, img_min, out=lut)
+                np.multiply(lut, 2 ** 16 - 1, out=lut)
+                np.divide(lut, img_span, out=lut)
 
-            # enforce max and min via clipping
-            np.clip(img_data_scale, 0, 2 ** 16 - 1, out=img_data_scale)
+                # enforce max and min via clipping
+                np.clip(lut, 0, 2 ** 16 - 1, out=lut)
 
-            # cast back to int16 after clipping
-            img_data_scale = img_data_scale.astype("uint16")
+            # cast back to int16 after clipping, then scale all pixels
+            img_data_scale = lut.astype("uint16")[img_data]
         else:
             # scale brightness of pixels
             # linear map: img_min-img_max to 0-(2**16-1)
@@ -353,8 +645,11 @@ class Reader:
                 int((x - img_min) * (2 ** 16 - 1) / img_span) for x in img_data
             ]
 
-            # enforce max and min via clipping
-            img_data_scale = [min(max(x, 0), 2 ** 16 - 1) for x in img_data_scale]
+            if imgsc != 1.0:
+                # enforce max and min via clipping
+                img_data_scale = [
+                    min(max(x, 0), 2 ** 16 - 1) for x in img_data_scale
+                ]
 
         # save to tiff file
         save_u16_to_tiff(img_data_scale, (img_x, img_y), tiff_filename)
@@ -385,6 +680,12 @@ class Reader:
         """
         # very fast, usu ~250us
 
+        # do not process again if we already have processed the file
+        if self.img_summary is not None:
+            return self.img_summary
+
+        self._check_loaded()
+
         # init summary dict
         summary = {}
 
@@ -400,13 +701,15 @@ class Reader:
                 byte_idx = end_idx + 8
 
             if field_info["type"] == 16:
-                info_str = field_info["payload"][:-1].decode("utf-8")
-                if ": " in info_str:
-                    # 'maxsplit' is incompatible with python 2.x
-                    info_str_list = info_str.split(": ", maxsplit=1)
+                # split on bytes, only decode the pieces we keep
+                (info_key, info_sep, info_item) = bytes(
+                    field_info["payload"][:-1]
+                ).partition(b": ")
+                if info_sep:
                     # <key_name>: <item_name>
-                    summary[info_str_list[0]] = info_str_list[1]
+                    summary[info_key.decode("utf-8")] = info_item.decode("utf-8")
                 else:
+                    info_str = info_key.decode("utf-8")
                     if info_str.startswith("Quantity One"):
                         summary["Quantity One"] = info_str
                     elif "\\" in info_str:
@@ -415,6 +718,8 @@ class Reader:
                         # as a last resort, make key=item=info_str
                         summary[info_str] = info_str
 
+        self.img_summary = summary
+
         return summary
 
     def _get_next_data_block_end(self, byte_idx):
@@ -430,12 +735,9 @@ class Reader:
             tuple: (block_num, end_idx) where block_num is the Data Block
                 that ends at end_idx-1
         """
-        for i in range(11):
-            if byte_idx < self.data_start[i] + self.data_len[i]:
-                block_num = i
-                end_idx = self.data_start[i] + self.data_len[i]
-                break
-        return (block_num, end_idx)
+        # data_ends is sorted, find first end after byte_idx
+        i = bisect.bisect_right(self.data_ends, byte_idx)
+        return (self.data_end_blocks[i], self.data_ends[i])
 
     def get_metadata(self):
         """Fetch All Metadata in File, return hierarchical dict/list
@@ -492,7 +794,11 @@ class Reader:
         if self.collections is not None:
             return self.collections
 
+        self._check_loaded()
+
         field_ids = {}
+        # every field in file order, so we only walk the file once
+        fields = []
         collections = []
 
         # start at first field of Data Block 0, get all ids
@@ -500,6 +806,7 @@ class Reader:
         while byte_idx < self.data_start[10]:
             (byte_idx, field_info) = self._read_field_lite(byte_idx)
             field_ids[field_info["id"]] = field_info
+            fields.append(field_info)
 
             if field_info["type"] == 0:
                 # we just saw an End Of Data Block Field
@@ -507,23 +814,18 @@ class Reader:
                 # skip to beginning of next data block
                 byte_idx = end_idx + 8
 
-        # start at first field of Data Block 0, process hierarchical
-        #   metadata
-        visited_ids = []
-        byte_idx = self.data_start[0] + 8
-        while byte_idx < self.data_start[10]:
-            (byte_idx, field_info) = self._read_field_lite(byte_idx)
-
-            if field_info["type"] == 0:
-                # we just saw an End Of Data Block Field
-                (_, end_idx) = self._get_next_data_block_end(byte_idx)
-                # skip to beginning of next data block
-                byte_idx = end_idx + 8
-            elif field_info["type"] in [2, 16]:
+        # process hierarchical metadata from all fields read above.
+        #   Fields can refer to fields later in the file, so this can't be
+        #   done until all fields are in field_ids.
+        visited_ids = set()
+        for field_info in fields:
+            if field_info["type"] in [0, 2, 16]:
+                # 0=End Of Data Block field
                 # 2=NOP field
                 # 16=string field (will be referenced later by other fields)
-                pass
-            elif field_info["type"] == 102:
+                continue
+
+            if field_info["type"] == 102:
                 # collection definition
                 field_types = {}
                 field_payload_info = process_payload_type102(
@@ -571,6 +873,8 @@ class Reader:
                     "Unknown Field Type %d in Collection" % field_info["type"]
                 )
 
+        self.collections = collections
+
         return collections
 
     def _make_compact_item(self, item):
@@ -593,23 +897,31 @@ class Reader:
         item_compact = {}
         item_compact["label"] = item["label"]
         item_compact["data"] = []
-        for region in item["data"]:
-            region_compact = {}
-            region_compact["label"] = region["label"]
-            if region["data"]["interp"] is not None:
-                if isinstance(region["data"]["interp"], dict):
-                    item_compact_hier = self._make_compact_item(
-                        region["data"]["interp"]
-                    )
-                    region_compact["data"] = item_compact_hier["data"]
+
+        # walk referenced items with a stack instead of recursing, each
+        #   entry is (regions to compact, list to put compact regions in)
+        stack = [(item["data"], item_compact["data"])]
+        while stack:
+            (regions, regions_compact) = stack.pop()
+            for region in regions:
+                region_data = region["data"]
+                region_compact = {}
+                region_compact["label"] = region["label"]
+                if region_data["interp"] is not None:
+                    if isinstance(region_data["interp"], dict):
+                        # filled in when this entry is popped off the stack
+                        region_compact["data"] = []
+                        stack.append(
+                            (region_data["interp"]["data"], region_compact["data"])
+                        )
+                    else:
+                        region_compact["data"] = region_data["interp"]
+                elif region_data["proc"] is not None:
+                    region_compact["data"] = region_data["proc"]
                 else:
-                    region_compact["data"] = region["data"]["interp"]
-            elif region["data"]["proc"] is not None:
-                region_compact["data"] = region["data"]["proc"]
-            else:
-                region_compact["data"] = region["data"]["raw"]
+                    region_compact["data"] = region_data["raw"]
 
-            item_compact["data"].append(region_compact)
+                regions_compact.append(region_compact)
 
         return item_compact
 
@@ -683,16 +995,10 @@ class Reader:
                 field, field_id is uint32 Field ID
 
         """
-        # read header
-        header_uint16s = unpack_uint16(
-            self.in_bytes[byte_idx : byte_idx + 8], endian="<"
+        # read header, all 8 bytes at once
+        (field_type, field_len, field_id) = FIELD_HEADER_STRUCT.unpack_from(
+            self.in_bytes, byte_idx
         )
-        header_uint32s = unpack_uint32(
-            self.in_bytes[byte_idx : byte_idx + 8], endian="<"
-        )
-        field_type = header_uint16s[0]
-        field_len = header_uint16s[1]
-        field_id = header_uint32s[1]
 
         # field_len of 1 means field_len=20 (only known to occur in
         #   Data Block pointer fields in file header)
@@ -716,15 +1022,15 @@ class Reader:
                         'id':<uint32 Field ID>
                         'start':<byte offset of start of field>
                         'len':<total length in bytes of field>
-                        'payload':<field payload bytes>
+                        'payload':<memoryview field payload bytes>
                     }
         """
         field_info = {}
         # read header
         (field_type, field_len, field_id) = self._process_field_header(byte_idx)
 
-        # get payload bytes
-        field_payload = self.in_bytes[byte_idx + 8 : byte_idx + field_len]
+        # get payload bytes, as a view into the file data instead of a copy
+        field_payload = self.in_view[byte_idx + 8 : byte_idx + field_len]
 
         field_info["type"] = field_type
         field_info["id"] = field_id
@@ -746,8 +1052,8 @@ class Reader:
         self.data_len = {}
 
         # Verify magic file number indicates 1sc file
-        magic_number = unpack_uint16(self.in_bytes[0:2], endian="<")
-        if magic_number[0] != 0xAFAF:
+        (magic_number,) = UINT16_STRUCT.unpack_from(self.in_bytes, 0)
+        if magic_number != 0xAFAF:
             raise BioRadInvalidFileError("Bad Magic Number")
 
         # Verify which endian, e.g. Intel Format == little-endian
@@ -766,25 +1072,150 @@ class Reader:
             raise BioRadInvalidFileError("Bad File Header")
 
         # get end of file header / start of data block 0
-        file_header_end = unpack_uint32(self.in_bytes[148:152], endian="<")
-        file_header_end = file_header_end[0]
+        (file_header_end,) = UINT32_STRUCT.unpack_from(self.in_bytes, 148)
 
         # get all data block pointers
+        #   the file header is a table of fixed-size Data Block pointer
+        #   fields, so unpack each one all at once
         while byte_idx < file_header_end:
-            field_start = byte_idx
-
-            (byte_idx, field_info) = self._read_field_lite(byte_idx)
+            (
+                field_type,
+                field_len,
+                _,
+                block_start,
+                block_len,
+            ) = BLOCK_PTR_STRUCT.unpack_from(self.in_bytes, byte_idx)
+
+            if field_type == 0:
+                break
 
             # record data blocks start, end
-            if field_info["type"] in BLOCK_PTR_TYPES:
-                block_num = BLOCK_PTR_TYPES[field_info["type"]]
-                out_uint32s = unpack_uint32(field_info["payload"], endian="<")
-                self.data_start[block_num] = out_uint32s[0]
-                self.data_len[block_num] = out_uint32s[1]
-
-            if field_info["type"] == 0:
-                break
+            if field_type in BLOCK_PTR_TYPES:
+                block_num = BLOCK_PTR_TYPES[field_type]
+                self.data_start[block_num] = block_start
+                self.data_len[block_num] = block_len
+                if len(self.data_start) == len(BLOCK_PTR_TYPES):
+                    # found all Data Block pointers, nothing else needed
+                    break
+
+            # field_len of 1 means field_len=20 (only known to occur in
+            #   Data Block pointer fields in file header)
+            if field_len == 1:
+                field_len = 20
 
             # break if we still aren't advancing
-            if byte_idx == field_start:
+            if field_len == 0:
                 raise Exception("Problem parsing file header")
+
+            byte_idx += field_len
+
+        # sorted ends of all data blocks, for _get_next_data_block_end()
+        block_ends = sorted(
+            (self.data_start[i] + self.data_len[i], i) for i in self.data_start
+        )
+        self.data_ends = [end_idx for (end_idx, _) in block_ends]
+        self.data_end_blocks = [block_num for (_, block_num) in block_ends]
+
+
+def _convert_one(in_filename, tiff_filename, invert, scale):
+    """Save the image of one 1sc file as a TIFF file
+
+    Worker for convert_many(), needs to be a module-level function so it
+    can be sent to a worker process.
+
+    Args:
+        in_filename (str): filepath to 1sc file
+        tiff_filename (str): filepath for output TIFF file
+        invert (bool): True to invert the brightness scale of output TIFF
+        scale (bool): True to expand brightness scale of output TIFF, as in
+            Reader.save_img_as_tiff_sc()
+
+    Returns:
+        str: tiff_filename
+    """
+    # release the memory-mapped file even if saving fails
+    with Reader(in_filename) as reader:
+        if scale:
+            reader.save_img_as_tiff_sc(tiff_filename, invert=invert)
+        else:
+            reader.save_img_as_tiff(tiff_filename, invert=invert)
+    return tiff_filename
+
+
+def _report_one(callback, in_filename, tiff_filename, get_result):
+    """Return get_result(), passing the outcome to callback if one is given
+
+    With a callback, any error from get_result() goes to the callback
+    instead of being raised, and None is returned.
+    """
+    if callback is None:
+        return get_result()
+    try:
+        result = get_result()
+    except Exception as err:
+        callback(in_filename, tiff_filename, err)
+        return None
+    callback(in_filename, tiff_filename, None)
+    return result
+
+
+def convert_many(file_pairs, invert=False, scale=False, max_workers=None,
+        callback=None):
+    """Save the images of many 1sc files as TIFF files, in parallel
+
+    Each file is converted independently in its own worker process.  A
+    single file is converted in this process, without starting workers.
+
+    Args:
+        file_pairs (iterable): (in_filename, tiff_filename) tuples, where
+            in_filename is a filepath to a 1sc file and tiff_filename is the
+            filepath for its output TIFF file
+        invert (bool, optional): True to invert the brightness scale of
+            output TIFF images compared to 1sc image data (black <-> white)
+        scale (bool, optional): True to expand brightness scale of output
+            TIFF images, as in Reader.save_img_as_tiff_sc()
+        max_workers (int, optional): maximum number of worker processes,
+            defaults to the number of CPUs
+        callback (callable, optional): called as
+            callback(in_filename, tiff_filename, error) as soon as each file
+            is finished, where error is None on success or else the
+            exception the conversion raised.  If given, errors are passed to
+            callback instead of being raised.
+
+    Returns:
+        list: tiff_filename of each converted file, in order of file_pairs.
+        With a callback, files that failed have None instead.
+
+    Raises:
+        BioRadInvalidFileError if any file is not a valid Bio-Rad 1sc file,
+        only if no callback is given
+    """
+    file_pairs = list(file_pairs)
+    tiff_filenames = [None] * len(file_pairs)
+
+    if len(file_pairs) == 1:
+        # no need to start worker processes for just one file
+        (in_filename, tiff_filename) = file_pairs[0]
+        tiff_filenames[0] = _report_one(
+            callback,
+            in_filename,
+            tiff_filename,
+            functools.partial(
+                _convert_one, in_filename, tiff_filename, invert, scale
+            ),
+        )
+        return tiff_filenames
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_convert_one, in_filename, tiff_filename, invert, scale): i
+            for (i, (in_filename, tiff_filename)) in enumerate(file_pairs)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            i = futures[future]
+            (in_filename, tiff_filename) = file_pairs[i]
+            tiff_filenames[i] = _report_one(
+                callback, in_filename, tiff_filename, future.result
+            )
+
+    return tiff_filenames
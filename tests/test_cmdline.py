@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+from terminaltables import AsciiTable
+from biorad1sc_reader.cmd_bio1scread import ascii_table
+from biorad1sc_reader.cmd_bio1sc2tiff import expand_src_files
+
+
+class TestAsciiTable(unittest.TestCase):
+    def assert_same_as_asciitable(self, table_data):
+        self.assertEqual(AsciiTable(table_data).table, ascii_table(table_data))
+
+    def test_single_row(self):
+        self.assert_same_as_asciitable([["Field Bytes", "Type", "Description"]])
+
+    def test_multi_row(self):
+        self.assert_same_as_asciitable([
+            ["Field Bytes", "Type", "Description", "Value(s)"],
+            ["0-1", "uint16", "Data Type", "   3"],
+            ["2-5", "uint32", "Reference", 1234567],
+            ["", "", "", ""],
+        ])
+
+    def test_multi_line_cell(self):
+        self.assert_same_as_asciitable([
+            ["Field\nBytes", "Type", "Description", "Value(s)"],
+            ["0-3", "uint32", "Reference", "42"],
+            ["", "", "", "(Label\nstring)"],
+        ])
+
+    def test_ragged_row(self):
+        self.assert_same_as_asciitable([
+            ["Field\nBytes", "Type", "Description", "Value(s)"],
+            ["0-3", "uint32"],
+            ["4-7"],
+        ])
+
+
+class TestExpandSrcFiles(unittest.TestCase):
+    def setUp(self):
+        """
+        Occurs before every test method
+        """
+        self.scratch_dir = tempfile.mkdtemp()
+        for filename in ['b.1sc', 'A.1SC', 'c.tif', 'notes.txt']:
+            with open(os.path.join(self.scratch_dir, filename), 'w'):
+                pass
+        # a directory is not a file, even if its name looks like one
+        os.mkdir(os.path.join(self.scratch_dir, 'subdir.1sc'))
+        with open(os.path.join(self.scratch_dir, 'subdir.1sc', 'd.1sc'), 'w'):
+            pass
+
+    def tearDown(self):
+        """
+        Occurs after every test method
+        """
+        shutil.rmtree(self.scratch_dir)
+
+    def test_directory(self):
+        self.assertEqual(
+            expand_src_files([self.scratch_dir]),
+            [
+                os.path.join(self.scratch_dir, 'A.1SC'),
+                os.path.join(self.scratch_dir, 'b.1sc'),
+            ]
+        )
+
+    def test_files_and_directory(self):
+        src_file = os.path.join(self.scratch_dir, 'c.tif')
+        self.assertEqual(
+            expand_src_files([src_file, self.scratch_dir]),
+            [
+                src_file,
+                os.path.join(self.scratch_dir, 'A.1SC'),
+                os.path.join(self.scratch_dir, 'b.1sc'),
+            ]
+        )
+
+    def test_empty_directory(self):
+        subdir = os.path.join(self.scratch_dir, 'empty')
+        os.mkdir(subdir)
+        self.assertEqual(expand_src_files([subdir]), [])
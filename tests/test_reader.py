@@ -3,7 +3,9 @@
 import os
 import os.path
 import shutil
+import io
 import unittest
+import unittest.mock
 import json
 from PIL import Image
 from PIL import ImageChops
@@ -195,6 +197,134 @@ class TestTiffExport(unittest.TestCase):
             self.compare_images(ref_img_file, test_img_file)
 
 
+    def test_img_data_cached(self):
+        for has_numpy in (True, False):
+            biorad1sc_reader.reader.HAS_NUMPY = has_numpy
+            infile_fullpath = os.path.join(self.testdata_dir, self.input_files[0])
+
+            myread = biorad1sc_reader.Reader(infile_fullpath)
+            img_data = myread.get_img_data()
+            img_data_inv = myread.get_img_data(invert=True)
+
+            # asking again must not read image size or data from file again
+            with unittest.mock.patch.object(
+                    myread, '_get_img_size', side_effect=AssertionError), \
+                    unittest.mock.patch.object(
+                    myread, '_flip_vertical', side_effect=AssertionError), \
+                    unittest.mock.patch.object(
+                    myread, '_iter_img_rows', side_effect=AssertionError):
+                self.assertIs(myread.get_img_data()[2], img_data[2])
+                self.assertIs(myread.get_img_data(invert=True)[2], img_data_inv[2])
+
+
+    def test_tif_with_statement(self):
+        for (i, infile) in enumerate(self.input_files):
+            infile_fullpath = os.path.join(self.testdata_dir, infile)
+            (inroot, _) = os.path.splitext(infile)
+
+            test_img_file = os.path.join(self.scratch_dir, inroot + "_test.tif")
+            ref_img_file = os.path.join(self.testdata_dir, self.tiff_ref_files[i])
+
+            with biorad1sc_reader.Reader(infile_fullpath) as myread:
+                myread.save_img_as_tiff(test_img_file)
+            # file is released on leaving the with block
+            self.assertIsNone(myread.in_bytes)
+
+            self.compare_images(ref_img_file, test_img_file)
+
+
+    def test_tif_after_close(self):
+        biorad1sc_reader.reader.HAS_NUMPY = True
+        for (i, infile) in enumerate(self.input_files):
+            infile_fullpath = os.path.join(self.testdata_dir, infile)
+            (inroot, _) = os.path.splitext(infile)
+
+            test_img_file = os.path.join(self.scratch_dir, inroot + "_test.tif")
+            ref_img_file = os.path.join(self.testdata_dir, self.tiff_ref_files[i])
+
+            # image data already read must not need the file again
+            myread = biorad1sc_reader.Reader(infile_fullpath)
+            myread.get_img_data()
+            myread.close()
+            myread.save_img_as_tiff(test_img_file)
+
+            self.compare_images(ref_img_file, test_img_file)
+
+
+    def test_read_after_close(self):
+        infile_fullpath = os.path.join(self.testdata_dir, self.input_files[0])
+        test_img_file = os.path.join(self.scratch_dir, "test1_test.tif")
+
+        myread = biorad1sc_reader.Reader(infile_fullpath)
+        myread.close()
+        # nothing was read before close, so there is nothing left to use
+        with self.assertRaisesRegex(ValueError, "No 1sc file loaded"):
+            myread.get_img_data()
+        with self.assertRaisesRegex(ValueError, "No 1sc file loaded"):
+            myread.get_metadata()
+        with self.assertRaisesRegex(ValueError, "No 1sc file loaded"):
+            myread.save_img_as_tiff(test_img_file)
+        self.assertFalse(os.path.exists(test_img_file))
+
+        # loading a file again makes the reader usable again
+        myread.open_file(infile_fullpath)
+        (img_x, img_y, _) = myread.get_img_data()
+        self.assertEqual((img_x, img_y), (myread.img_size_x, myread.img_size_y))
+        myread.close()
+
+
+    def test_empty_stream(self):
+        with self.assertRaises(biorad1sc_reader.BioRadInvalidFileError):
+            biorad1sc_reader.Reader(io.BytesIO(b""))
+
+
+    def test_tif_sc_convert_many(self):
+        file_pairs = []
+        for infile in self.input_files:
+            infile_fullpath = os.path.join(self.testdata_dir, infile)
+            (inroot, _) = os.path.splitext(infile)
+            test_img_file = os.path.join(self.scratch_dir, inroot + "_test.tif")
+            file_pairs.append((infile_fullpath, test_img_file))
+
+        out_files = biorad1sc_reader.convert_many(file_pairs, scale=True)
+
+        self.assertEqual(out_files, [tiff_file for (_, tiff_file) in file_pairs])
+        for (i, test_img_file) in enumerate(out_files):
+            ref_img_file = os.path.join(self.testdata_dir, self.tiff_ref_sc_files[i])
+            self.compare_images(ref_img_file, test_img_file)
+
+
+    def test_convert_many_callback(self):
+        infile_fullpath = os.path.join(self.testdata_dir, self.input_files[0])
+        test_img_file = os.path.join(self.scratch_dir, "test1_test.tif")
+        bad_file = os.path.join(self.scratch_dir, 'empty.1sc')
+        bad_img_file = os.path.join(self.scratch_dir, "empty_test.tif")
+        with open(bad_file, 'wb'):
+            pass
+
+        reported = {}
+        def callback(in_filename, tiff_filename, error):
+            reported[in_filename] = (tiff_filename, error)
+
+        # errors go to the callback instead of being raised
+        out_files = biorad1sc_reader.convert_many(
+                [(infile_fullpath, test_img_file), (bad_file, bad_img_file)],
+                callback=callback
+                )
+        self.assertEqual(out_files, [test_img_file, None])
+        self.assertEqual(reported[infile_fullpath], (test_img_file, None))
+        self.assertIsInstance(
+                reported[bad_file][1], biorad1sc_reader.BioRadInvalidFileError)
+
+        # one file is converted without worker processes, reported the same
+        reported.clear()
+        out_files = biorad1sc_reader.convert_many(
+                [(bad_file, bad_img_file)], callback=callback)
+        self.assertEqual(out_files, [None])
+        self.assertIsInstance(
+                reported[bad_file][1], biorad1sc_reader.BioRadInvalidFileError)
+
+
 class BytesEncoder(json.JSONEncoder):
     def default(self, obj):
         # handle bytes if found
@@ -235,6 +365,19 @@ class TestMetadataExport(unittest.TestCase):
             self.assertEqual(refmeta_json, testmeta_json)
 
 
+    def test_get_metadata_cached(self):
+        for infile in self.input_files:
+            infile_fullpath = os.path.join(self.testdata_dir, infile)
+
+            testread = biorad1sc_reader.Reader(infile_fullpath)
+            testmeta = testread.get_metadata()
+
+            # second call returns the same object, without reading the file
+            with unittest.mock.patch.object(
+                    testread, '_read_field_lite', side_effect=AssertionError):
+                self.assertIs(testread.get_metadata(), testmeta)
+
+
     def test_get_metadata_compact(self):
         for (i, infile) in enumerate(self.input_files):
             infile_fullpath = os.path.join(self.testdata_dir, infile)